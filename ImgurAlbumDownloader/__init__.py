@@ -1 +1 @@
-from ImgurAlbumDownloader.imguralbum import ImgurAlbumDownloader, ImgurAlbumException
\ No newline at end of file
+from ImgurAlbumDownloader.imguralbum import ImgurAlbumDownloader, ImgurAlbumException, ImgurImage
\ No newline at end of file
@@ -15,16 +15,30 @@ Copyright Alex Gisby <alex@solution10.com>
 
 import sys
 import re
+import importlib.util
+import json
 import requests
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 from requests.exceptions import ConnectionError, Timeout, HTTPError, RequestException, TooManyRedirects
 from requests.packages.urllib3.exceptions import MaxRetryError
+from requests.packages.urllib3.response import HTTPResponse as Urllib3Response
 
 import os
-from collections import Counter
-from PIL import Image, UnidentifiedImageError
-from io import BytesIO
+import struct
+import asyncio
+import threading
+from collections import Counter, namedtuple
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# httpx only speaks HTTP/2 with the h2 package installed (pip install httpx[http2])
+_HTTP2_AVAILABLE = httpx is not None and importlib.util.find_spec('h2') is not None
 
 
 help_message = """
@@ -42,58 +56,169 @@ as the album
 """
 
 
+# Sidecar file in the album folder holding the ETag of each downloaded image
+_ETAGS_FILENAME = '.etags.json'
+
+# An image in an album, e.g. ImgurImage(hash='fGWX0', ext='.jpg')
+ImgurImage = namedtuple('ImgurImage', ['hash', 'ext'])
+
+
+_ALBUM_URL_RE = re.compile(r"(https?)://(?:www\.)?(?:m\.)?imgur\.com/(?:(?:a|gallery)/)?([a-zA-Z0-9]+)(#[0-9]+)?")
+_ALBUM_DATA_RE = re.compile(r'\bimage\s*:\s*(?=\{)')
+_IMG_ID_RE_ALL = re.compile(r'"hash":"([a-zA-Z0-9]+)"[^}]{0,256}?"ext":"(\.[a-zA-Z0-9]+)"')
+
+
+@lru_cache(maxsize=32)
+def _compile_ext_re(extn:tuple):
+    """
+    Compiles the image ID regex for only the given extensions, once per set of extensions.
+    Like _IMG_ID_RE_ALL it only captures (hash, ext).
+    """
+    return re.compile(r'"hash":"([a-zA-Z0-9]+)"[^}]{0,256}?"ext":"(\.(?:' + '|'.join(map(re.escape, extn)) + r'))"')
+
+
+# JPEG start of frame markers, which hold the image dimensions (C4, C8 and CC aren't frames)
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _image_size(data:bytes):
+    """
+    Reads the (width, height) of a PNG, GIF or JPEG straight out of its header bytes,
+    without decoding the image. Returns None if the format isn't recognised or the
+    header is cut short.
+    """
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and len(data) >= 24:
+        return struct.unpack('>II', data[16:24])
+
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        return struct.unpack('<HH', data[6:10])
+
+    if data[:2] == b'\xff\xd8':
+        i = 2
+        while i + 9 <= len(data):
+            if data[i] != 0xFF:
+                return None
+            marker = data[i + 1]
+            if marker == 0xFF: # fill byte
+                i += 1
+            elif marker == 0x01 or 0xD0 <= marker <= 0xD9: # markers without a segment
+                i += 2
+            elif marker in _JPEG_SOF_MARKERS:
+                h, w = struct.unpack('>HH', data[i + 5:i + 9])
+                return (w, h)
+            else:
+                i += 2 + struct.unpack('>H', data[i + 2:i + 4])[0]
+
+    return None
+
+
+def _album_images_from_json(html:str, extn:list = None):
+    """
+    Pulls an ImgurImage for every image out of the album data the page embeds
+    as "image : {...}", keeping only the extensions in extn if it's given.
+    Returns None if the page doesn't have any album data we can read.
+    """
+    match = _ALBUM_DATA_RE.search(html)
+    if not match:
+        return None
+
+    try:
+        data, _ = json.JSONDecoder().raw_decode(html, match.end())
+        images = data['album_images']['images']
+        # keyed on hash to drop duplicates while keeping the album order
+        found = {img['hash']: ImgurImage(img['hash'], img['ext']) for img in images if not extn or img['ext'].lstrip('.') in extn}
+    except (ValueError, KeyError, TypeError):
+        return None
+
+    return list(found.values())
+
+
+def _write_atomic(path:str, write):
+    """
+    Calls write with a file open on path + '.part' and moves it over path once it's done,
+    so an interrupted download never leaves a truncated image that looks finished.
+    """
+    tmp_path = path + '.part'
+    try:
+        with open(tmp_path, 'wb') as fobj:
+            write(fobj)
+        os.replace(tmp_path, path)
+    finally:
+        _discard_part(path)
+
+
+def _discard_part(path:str):
+    """
+    Removes the .part file left behind by a write to path that didn't finish.
+    """
+    tmp_path = path + '.part'
+    if os.path.exists(tmp_path): os.remove(tmp_path)
+
+
 class ImgurAlbumException(Exception):
     def __init__(self, msg=False):
         self.msg = msg
 
 
 class ImgurAlbumDownloader:
-    def __init__(self, album_url:str , extn:list = None, retry_strategy:Retry = None, verbose:bool = False):
+    # Images are always fetched over https, so imgur doesn't have to redirect us there
+    _BASE = "https://i.imgur.com/"
+
+    def __init__(self, album_url:str , extn:list = None, retry_strategy:Retry = None, verbose:bool = False, max_workers:int = 16):
         """
         Will download an Imgur album given by the URL on construction. URL will be checked for validity.
         
         :param album_url: The URL of the Imgur album to download.
         :param extn: A list of file extensions to look for. Defaults to All
         :param retry_strategy: A Retry strategy to use for the requests. Defaults to 4 retries with exponential backoff.
+        :param max_workers: How many images to download in parallel. Defaults to 16.
         """
         self.album_url = album_url
         self.verbose = verbose
+        self.max_workers = max_workers
 
         if not retry_strategy:
             # Default retry strategy, with 4 retries and exponential backoff
+            # Only transient errors are retried, so a dead album fails straight away
             retry_strategy = Retry(
                 total=4,
                 backoff_factor=1, # 1, 2, 4, 8, 16 seconds between retries
                 status_forcelist=[429, 500, 502, 503, 504],
-                allowed_methods=["GET"]
+                allowed_methods=["GET"],
+                raise_on_status=False
             )
+        self.retry_strategy = retry_strategy
         
         # Callback members:
         self.image_callbacks = []
         self.success_callbacks = []
         self.complete_callbacks = []
+        self._callback_lock = threading.Lock()
 
         # Check the URL is actually imgur:
-        match = re.match(r"(https?)\:\/\/(www\.)?(?:m\.)?imgur\.com/(?:(?:a|gallery)/)?([a-zA-Z0-9]+)(#[0-9]+)?", album_url)
+        match = _ALBUM_URL_RE.match(album_url)
         if not match:
             raise ImgurAlbumException("URL must be a valid Imgur Album {}".format(album_url))
 
         self.protocol = match.group(1)
-        self.album_key = match.group(3)
+        self.album_key = match.group(2)
 
         # Read the no-script version of the page for all the images:
-        fullListURL = "http://imgur.com/a/" + self.album_key + "/layout/blog"
+        fullListURL = f"https://imgur.com/a/{self.album_key}/layout/blog"
 
 
-        # Create a requests session with the retry strategy
+        # Create a requests session with the retry strategy.
+        # Pool one connection per worker so keep-alive connections get reused
+        # across downloads instead of being thrown away when the pool is full
         self.session = requests.Session()
-        self.session.mount("https://", HTTPAdapter(max_retries=retry_strategy))
-        self.session.mount("http://", HTTPAdapter(max_retries=retry_strategy))
+        self.session.mount("https://", HTTPAdapter(max_retries=retry_strategy, pool_connections=2, pool_maxsize=self.max_workers, pool_block=True))
+        self.session.mount("http://", HTTPAdapter(max_retries=retry_strategy, pool_connections=2, pool_maxsize=self.max_workers, pool_block=True))
         
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'image/*,text/html;q=0.8,*/*;q=0.7',
-            'Referer': 'https://imgur.com/'
+            'Referer': 'https://imgur.com/',
+            'Connection': 'keep-alive'
         }
         
         # Use the session to get the image with retries, redirects and headers
@@ -102,25 +227,23 @@ class ImgurAlbumDownloader:
             response_code = self.response.status_code
         except Exception as e:
             self.response = False
-            response_code = e.code
+            response_code = getattr(getattr(e, 'response', None), 'status_code', None) or -1
 
-        if not self.response or self.response.status_code != requests.codes['ok']:
+        if response_code != 200:
             raise ImgurAlbumException("Error reading Imgur: Error Code %d" % response_code)
 
         # Read in the images now so we can get stats and stuff:
         html = self.response.text
-        ext_regex = r"(\.(" + '|'.join(extn) + "))" if extn else ".*?"
-        self.imageIDs = re.findall(r'.*?{"hash":"([a-zA-Z0-9]+)".*?"ext":"(\.(' + ext_regex + '))".*?', html)
-        
-        ## this is likely to have a lot of duplicates, so let's kill those
-        self.imageIDs = list(set([i[0:2] for i in self.imageIDs]))
-        self.imageURLs = ["https://i.imgur.com/" + i[0] + i[1] for i in self.imageIDs]
-        
-        
-        self.cnt = Counter()
-        
-        for i in self.imageIDs:
-            self.cnt[i[1]] += 1
+        self.imageIDs = _album_images_from_json(html, extn)
+
+        if self.imageIDs is None:
+            # No album data embedded in the page, so fall back to scraping it for hashes
+            image_id_re = _compile_ext_re(tuple(sorted(extn))) if extn else _IMG_ID_RE_ALL
+            
+            ## this is likely to have a lot of duplicates, so let's kill those (keeping the album order)
+            self.imageIDs = list(dict.fromkeys(ImgurImage(h, e) for h, e in image_id_re.findall(html)))
+        self.imageURLs = [f"{self._BASE}{i.hash}{i.ext}" for i in self.imageIDs]
+        self.cnt = Counter(i.ext for i in self.imageIDs)
 
 
     def num_images(self):
@@ -147,10 +270,12 @@ class ImgurAlbumDownloader:
 
     def on_image_download(self, callback):
         """
-        Allows you to bind a function that will be called just before an image is
-        about to be downloaded. You'll be given the 1-indexed position of the image, it's URL
+        Allows you to bind a function that will be called for each image in the album as
+        its download is queued. You'll be given the 1-indexed position of the image, it's URL
         and it's destination file in the callback like so:
-            my_awesome_callback(1, "http://i.imgur.com/fGWX0.jpg", "~/Downloads/1-fGWX0.jpg")
+            my_awesome_callback(1, "https://i.imgur.com/fGWX0.jpg", "~/Downloads/1-fGWX0.jpg")
+        Since images are downloaded in parallel, this is called for every image, in album order,
+        before any of the downloads start, including images that end up being skipped.
         """
         self.image_callbacks.append(callback)
 
@@ -159,7 +284,9 @@ class ImgurAlbumDownloader:
         Allows you to bind a function that will be called after an image is downloaded sucessfully.
         You'll be given the 1-indexed position of the image, it's URL
         and it's destination file in the callback like so:
-            my_awesome_callback(1, "http://i.imgur.com/fGWX0.jpg", "~/Downloads/1-fGWX0.jpg")
+            my_awesome_callback(1, "https://i.imgur.com/fGWX0.jpg", "~/Downloads/1-fGWX0.jpg")
+        Since images are downloaded in parallel, this is called from a worker thread
+        and in whatever order the downloads finish.
         """
         self.success_callbacks.append(callback)
 
@@ -171,15 +298,163 @@ class ImgurAlbumDownloader:
         self.complete_callbacks.append(callback)
 
 
-    def save_images(self, foldername = None, useKey = False):
+    @staticmethod
+    def _is_placeholder(header:bytes):
         """
-        Saves the images from the album into a folder given by foldername.
-        If no foldername is given, it'll use the cwd and the album key.
-        And if the folder doesn't exist, it'll try and create it.
-        
-        If addKey is true then the name of the image will be YYYYYY_XX
-        where XX is the image number and YYYYY is the album key (which is
-        a 'unique' Imgur created hash
+        Checks whether the start of a download is the imgur image not found image.
+        """
+        return _image_size(header) == (161, 81)
+
+
+    def _run_success_callbacks(self, counter, image_url, path):
+        """
+        Runs the success callbacks, one download at a time.
+        """
+        with self._callback_lock:
+            for fn in self.success_callbacks:
+                fn(counter, image_url, path)
+
+
+    def _request_headers(self, image, path, etags, existing):
+        """
+        Works out the headers to download an image with. If it's already been downloaded
+        and we have its ETag, the request is made conditional so an unchanged image costs
+        a 304 instead of the whole thing. Returns None if the image should be skipped.
+        existing is the set of filenames already in the album folder.
+        """
+        if os.path.basename(path) not in existing:
+            return self.headers
+
+        if image.hash not in etags:
+            if self.verbose: print (f"Skipping, {path} alreadyexists.")
+            return None
+
+        return {**self.headers, 'If-None-Match': etags[image.hash]}
+
+
+    def _download_one(self, counter, image, image_url, path, etags, existing):
+        """
+        Downloads a single image to path. Runs on one of the worker threads of save_images,
+        so the success callbacks are run under a lock.
+        Returns a tuple of (counter, image_url, path, status).
+        """
+        headers = self._request_headers(image, path, etags, existing)
+        if headers is None:
+            return (counter, image_url, path, 'skipped')
+
+        try:
+            status, etag = self._stream_image_to(image_url, path, headers)
+        except (ConnectionError, Timeout, HTTPError, RequestException, TooManyRedirects, MaxRetryError) as e:
+            if self.verbose: print (f"Download failed: {type(e).__name__} {e}")
+            return (counter, image_url, path, 'failed')
+
+        if status == 'not modified':
+            if self.verbose: print (f"Skipping, {path} is up to date.")
+            return (counter, image_url, path, 'skipped')
+
+        if status == 'ok':
+            if etag: etags[image.hash] = etag
+            existing.add(os.path.basename(path))
+            self._run_success_callbacks(counter, image_url, path)
+
+        return (counter, image_url, path, status)
+
+
+    def _stream_image_to(self, image_url, path, headers):
+        """
+        Downloads an image straight into path in a single pass: the first 64 KiB chunk is read
+        to check it isn't the imgur not found image, then it and the rest of the body
+        are copied to the file without ever holding the whole image in memory.
+        The body is read through iter_content so read errors come out as requests exceptions.
+        Returns a tuple of the status ('ok', 'not found' or 'not modified') and the ETag.
+        """
+        imageRequest = self.session.get(image_url, headers=headers, allow_redirects=True, stream=True, timeout=30)
+        try:
+            if imageRequest.status_code == requests.codes['not_modified']:
+                return ('not modified', None)
+            imageRequest.raise_for_status() # don't save error pages as images
+
+            chunks = imageRequest.iter_content(65536)
+            header = next(chunks, b'')
+
+            if self._is_placeholder(header):
+                return ('not found', None)
+
+            def write(fobj):
+                fobj.write(header)
+                for chunk in chunks:
+                    fobj.write(chunk)
+            _write_atomic(path, write)
+
+            return ('ok', imageRequest.headers.get('ETag'))
+        finally:
+            imageRequest.close()
+
+
+    @staticmethod
+    def _next_retry(retry, image_url, response):
+        """
+        Advances retry past a failed async response the way urllib3 does for the requests
+        session, so both download paths share the Retry's counters and backoff.
+        Returns a tuple of the new Retry and how long to wait, or None if it shouldn't be retried.
+        """
+        # urllib3 only needs the status and headers, so a body-less HTTPResponse stands in
+        urllib3_response = Urllib3Response(status=response.status_code, headers=dict(response.headers), preload_content=False)
+        has_retry_after = bool(response.headers.get('Retry-After'))
+        if not retry.is_retry('GET', response.status_code, has_retry_after):
+            return None
+
+        try:
+            retry = retry.increment(method='GET', url=image_url, response=urllib3_response)
+        except MaxRetryError:
+            return None
+
+        delay = retry.get_retry_after(urllib3_response) if retry.respect_retry_after_header else None
+        return (retry, delay or retry.get_backoff_time())
+
+
+    async def _stream_image_to_async(self, client, image_url, path, headers):
+        """
+        The asyncio version of _stream_image_to, with the same single pass over the body.
+        The file is opened, written and moved into place on the default executor so the
+        disk never holds up the event loop.
+        Returns a tuple of the status ('ok', 'not found' or 'not modified') and the ETag.
+        """
+        loop = asyncio.get_running_loop()
+
+        async with client.stream('GET', image_url, headers=headers) as r:
+            if r.status_code == requests.codes['not_modified']:
+                return ('not modified', None)
+            r.raise_for_status() # don't save error pages as images
+
+            chunks = r.aiter_bytes(65536)
+            try:
+                header = await chunks.__anext__()
+            except StopAsyncIteration:
+                header = b''
+
+            if self._is_placeholder(header):
+                return ('not found', None)
+
+            tmp_path = path + '.part'
+            try:
+                fobj = await loop.run_in_executor(None, open, tmp_path, 'wb')
+                try:
+                    await loop.run_in_executor(None, fobj.write, header)
+                    async for chunk in chunks:
+                        await loop.run_in_executor(None, fobj.write, chunk)
+                finally:
+                    await loop.run_in_executor(None, fobj.close)
+                await loop.run_in_executor(None, os.replace, tmp_path, path)
+            finally:
+                await loop.run_in_executor(None, _discard_part, path)
+
+            return ('ok', r.headers.get('ETag'))
+
+
+    def _album_folder(self, foldername):
+        """
+        Works out the folder to save the album into, creating it if needs be.
         """
         # Try and create the album folder:
         if foldername != None:
@@ -187,48 +462,175 @@ class ImgurAlbumDownloader:
         else:
             albumFolder = self.album_key
 
-        if not os.path.exists(albumFolder):
-            os.makedirs(albumFolder)
+        os.makedirs(albumFolder, exist_ok=True)
+
+        return albumFolder
 
-        # And finally loop through and save the images:
+
+    def _prepare_jobs(self, albumFolder, useKey):
+        """
+        Works out the URL and destination of every image, running the image callbacks
+        as it goes. Returns a list of (counter, image, image_url, path).
+        """
+        # Pad the image numbers so the files still sort in order past 99 images
+        width = max(2, len(str(len(self.imageIDs))))
+        suffix_format = f"_{{:0>{width}}}"
+
+        jobs = []
         for (counter, image) in enumerate(self.imageIDs, start=1):
-            image_url = "http://i.imgur.com/"+image[0]+image[1]
+            image_url = f"{self._BASE}{image.hash}{image.ext}"
 
-            suffix = "_{:0>2}".format(counter) ## should be good for up to 100 images
+            suffix = suffix_format.format(counter)
             path = ""
             if useKey:
-                path = os.path.join(albumFolder, self.album_key + suffix + image[1])
+                path = os.path.join(albumFolder, f"{self.album_key}{suffix}{image.ext}")
             else:
-                path = os.path.join(albumFolder, image[0] + suffix + image[1])
+                path = os.path.join(albumFolder, f"{image.hash}{suffix}{image.ext}")
 
             # Run the callbacks:
             for fn in self.image_callbacks:
                 fn(counter, image_url, path)
 
-            # Actually download the thing
-            if os.path.isfile(path):
-                if self.verbose: print (f"Skipping, {path} alreadyexists.")
-            else:
+            jobs.append((counter, image, image_url, path))
+
+        return jobs
+
+
+    @staticmethod
+    def _load_etags(albumFolder):
+        """
+        Reads the ETags of previously downloaded images, keyed on image hash.
+        """
+        try:
+            with open(os.path.join(albumFolder, _ETAGS_FILENAME)) as fobj:
+                return json.load(fobj)
+        except (OSError, ValueError):
+            return {}
+
+
+    @staticmethod
+    def _save_etags(albumFolder, etags):
+        """
+        Writes the ETags out next to the images, replacing the old file in one go.
+        """
+        if not etags:
+            return
+
+        etag_path = os.path.join(albumFolder, _ETAGS_FILENAME)
+        with open(etag_path + '.tmp', 'w') as fobj:
+            json.dump(etags, fobj)
+        os.replace(etag_path + '.tmp', etag_path)
+
+
+    def _prepare_save(self, foldername, useKey):
+        """
+        Does the setup shared by save_images and save_images_async.
+        Returns a tuple of (albumFolder, jobs, etags, existing), where existing is
+        the set of filenames already in the album folder.
+        """
+        albumFolder = self._album_folder(foldername)
+        jobs = self._prepare_jobs(albumFolder, useKey)
+        etags = self._load_etags(albumFolder)
+        # One directory listing up front instead of a stat per image
+        existing = set(e.name for e in os.scandir(albumFolder) if e.is_file())
+        return (albumFolder, jobs, etags, existing)
+
+
+    def save_images(self, foldername = None, useKey = False):
+        """
+        Saves the images from the album into a folder given by foldername.
+        If no foldername is given, it'll use the cwd and the album key.
+        And if the folder doesn't exist, it'll try and create it.
+        
+        If addKey is true then the name of the image will be YYYYYY_XX
+        where XX is the image number (with more digits for albums of 100+ images) and YYYYY is the album key (which is
+        a 'unique' Imgur created hash
+
+        The images are downloaded in parallel, max_workers at a time.
+        Their ETags are kept in .etags.json in the folder, so on later runs
+        images that are already there are only downloaded again if they changed.
+        """
+        albumFolder, jobs, etags, existing = self._prepare_save(foldername, useKey)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(self._download_one, *job, etags, existing) for job in jobs]
+                for future in as_completed(futures):
+                    future.result()
+        finally:
+            self._save_etags(albumFolder, etags)
+
+        # Run the complete callbacks:
+        for fn in self.complete_callbacks:
+            fn()
+
+
+    async def save_images_async(self, foldername = None, useKey = False, concurrency = 64):
+        """
+        Same as save_images, but downloads on an asyncio event loop with httpx,
+        keeping up to concurrency requests in flight at once:
+            asyncio.run(downloader.save_images_async())
+
+        With HTTP/2 available the requests are multiplexed over a handful of connections
+        rather than needing one connection each. Failed statuses are retried by advancing
+        the same retry_strategy as save_images, so the counts and backoff match.
+        If httpx isn't installed, save_images is run in an executor instead.
+        """
+        if httpx is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.save_images, foldername, useKey)
+
+        albumFolder, jobs, etags, existing = self._prepare_save(foldername, useKey)
+        sem = asyncio.Semaphore(concurrency)
+
+        connections = 4 if _HTTP2_AVAILABLE else concurrency
+        limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+        async with httpx.AsyncClient(http2=_HTTP2_AVAILABLE, limits=limits, timeout=30.0, follow_redirects=True) as client:
+            async def _fetch(counter, image, image_url, path):
+                headers = self._request_headers(image, path, etags, existing)
+                if headers is None:
+                    return (counter, image_url, path, 'skipped')
+
+                # Connection headers are forbidden in HTTP/2, httpx keeps connections alive anyway
+                headers = {k: v for k, v in headers.items() if k != 'Connection'}
+
                 try:
-                    imageRequest = self.session.get(image_url, headers=self.headers, allow_redirects=True, timeout=30)
-                    imageData = imageRequest.content
-                    
-                    im = Image.open(BytesIO(imageData))
-                    w, h = im.size
-                    im.close()
-                    
-                    if (w == 161 and h == 81): # this is the imgur image not found jpg
-                        continue
-                    
-                    with open(path, 'wb') as fobj:
-                        fobj.write(imageData)
-                    
-                    for fn in self.success_callbacks:
-                        fn(counter, image_url, path)    
-                    
-                except (ConnectionError, Timeout, HTTPError, RequestException, TooManyRedirects, UnidentifiedImageError, MaxRetryError) as e:
+                    retry = Retry.from_int(self.retry_strategy)
+                    while True:
+                        try:
+                            async with sem:
+                                status, etag = await self._stream_image_to_async(client, image_url, path, headers)
+                            break
+                        except httpx.HTTPStatusError as e:
+                            next_retry = self._next_retry(retry, image_url, e.response)
+                            if next_retry is None:
+                                raise
+                            retry, delay = next_retry
+                            await asyncio.sleep(delay)
+                except httpx.HTTPError as e:
                     if self.verbose: print (f"Download failed: {type(e).__name__} {e}")
-                    if os.path.exists(path): os.remove(path)
+                    return (counter, image_url, path, 'failed')
+
+                if status == 'not modified':
+                    if self.verbose: print (f"Skipping, {path} is up to date.")
+                    return (counter, image_url, path, 'skipped')
+
+                if status == 'ok':
+                    if etag: etags[image.hash] = etag
+                    existing.add(os.path.basename(path))
+                    self._run_success_callbacks(counter, image_url, path)
+
+                return (counter, image_url, path, status)
+
+            try:
+                # Let every download finish before failing, as save_images' executor does
+                results = await asyncio.gather(*[_fetch(*job) for job in jobs], return_exceptions=True)
+            finally:
+                await asyncio.get_running_loop().run_in_executor(None, self._save_etags, albumFolder, etags)
+
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
 
         # Run the complete callbacks:
         for fn in self.complete_callbacks:
@@ -253,9 +655,9 @@ if __name__ == '__main__':
         for i in downloader.list_extensions():
             print(("Found {0} files with {1} extension".format(i[1],i[0])))
   
-        # Called when an image is about to download:
+        # Called when an image is queued for download:
         def print_image_progress(index, url, dest):
-            print(("Downloading Image %d" % index))
+            print(("Queueing Image %d" % index))
             print(("    %s >> %s" % (url, dest)))
         downloader.on_image_download(print_image_progress)
 
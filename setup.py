@@ -6,7 +6,8 @@ setup(
     author='Alex Gisby',
     author_email='alex@solution10.com',
     packages=find_packages(exclude=['tests*']),
-    install_requires=['requests', 'pillow'],
+    install_requires=['requests'],
+    extras_require={'async': ['httpx[http2]']},
     version='0.2-014',
     license='MIT',
     description='Download a whole Imgur album in one go',